@@ -9,11 +9,16 @@ multi-column layouts (2-3 columns using || delimiter).
 
 import re
 import argparse
+from copy import deepcopy
+from functools import lru_cache
 import yaml
+from lxml import etree
 from markdown_it import MarkdownIt
 from pptx import Presentation
+from pptx.oxml.ns import qn
+from pptx.oxml.xmlchemy import OxmlElement
 from pptx.util import Inches, Pt
-from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE
+from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE, MSO_UNDERLINE
 from pptx.dml.color import RGBColor
 
 # ============================================================================
@@ -21,17 +26,40 @@ from pptx.dml.color import RGBColor
 # ============================================================================
 
 DEFAULT_FONT = "Heebo"
+CODE_FONT = "Courier New"
+BODY_SIZE = Pt(18)
+CODE_SIZE = Pt(14)
+TITLE_SIZE = Pt(32)
+SECTION_TITLE_SIZE = Pt(44)                 # Also used for the title slide
+SUBTITLE_SIZE = Pt(24)
 ACCENT_COLOR = RGBColor(0x36, 0x4F, 0x6B)  # Smoky blue for titles, bold, italic, links
 TEXT_COLOR = RGBColor(0, 0, 0)              # Black for regular text
+BULLET_CHAR = "•"
+AUTO_FIT = True                             # Shrink text on overflow; False skips autofit XML
+BU_CHAR_TAG = qn('a:buChar')
+BU_NONE_TAG = qn('a:buNone')
+BULLET_TAGS = frozenset((BU_NONE_TAG, BU_CHAR_TAG, qn('a:buAutoNum'), qn('a:buBlip')))
 MD_PARSER = MarkdownIt('commonmark', {'breaks': True, 'html': True}).enable('table')
 
+FRONTMATTER_RE = re.compile(r'^---\s*\n([\s\S]*?)\n---\s*\n')
+SLIDE_SEPARATOR = '\n---\n'
+NOTES_RE = re.compile(r'<!--\s*Notes:\s*(.*?)\s*-->', re.DOTALL)
+TITLE_LINE_RE = re.compile(r'^[^\S\n]*#.*\n?', re.MULTILINE)
+SECTION_ONLY_RE = re.compile(r'#{1,2}[ \t]+([^\s#](?:[^#\r\n]*[^\s#])?)[ \t]*')
+
 # ============================================================================
 # PARSING FUNCTIONS
 # ============================================================================
 
+@lru_cache(maxsize=512)
+def parse_markdown(content):
+    """Tokenize markdown once per unique text. Returns an immutable token tuple."""
+    return tuple(MD_PARSER.parse(content))
+
+
 def extract_frontmatter(markdown_content):
     """Extract YAML frontmatter. Returns: (frontmatter_dict, content_without_frontmatter)"""
-    match = re.match(r'^---\s*\n(.*?)\n---\s*\n', markdown_content, re.DOTALL)
+    match = FRONTMATTER_RE.match(markdown_content)
     if match:
         try:
             frontmatter = yaml.safe_load(match.group(1))
@@ -42,36 +70,42 @@ def extract_frontmatter(markdown_content):
 
 
 def split_slides(markdown_content):
-    """Split markdown content on --- separators"""
-    return re.split(r'\n---\n', markdown_content)
+    """Lazily yield slides separated by --- lines"""
+    start = 0
+    while True:
+        end = markdown_content.find(SLIDE_SEPARATOR, start)
+        if end == -1:
+            yield markdown_content[start:]
+            return
+        yield markdown_content[start:end]
+        start = end + len(SLIDE_SEPARATOR)
 
 
 def extract_notes(slide_content):
     """Extract speaker notes from HTML comments: <!-- Notes: text -->"""
-    pattern = r'<!--\s*Notes:\s*(.*?)\s*-->'
-    notes_match = re.search(pattern, slide_content, re.DOTALL)
-    content = re.sub(pattern, '', slide_content, flags=re.DOTALL)
-    notes = notes_match.group(1).strip() if notes_match else ""
-    return content.strip(), notes
+    if '<!--' not in slide_content:
+        return slide_content.strip(), ""
+
+    # One scan: split yields [text, note, text, note, ..., text]
+    # The pattern's \s* on both sides already trims the captured note
+    parts = NOTES_RE.split(slide_content)
+    notes = parts[1] if len(parts) > 1 else ""
+    return ''.join(parts[::2]).strip(), notes
 
 
 def parse_slide_content(content):
     """Parse markdown into title and body tokens."""
-    tokens = MD_PARSER.parse(content)
+    tokens = parse_markdown(content)
     title = ""
     body_tokens = tokens
 
     # Find first h1 or h2 as title
     for i, token in enumerate(tokens):
         if token.type == 'heading_open' and token.tag in ['h1', 'h2']:
-            if tokens[i + 1].type == 'inline':
-                title = tokens[i + 1].content.strip()
-                # Find heading_close and slice
-                end_idx = i
-                while tokens[end_idx].type != 'heading_close':
-                    end_idx += 1
-                body_tokens = tokens[end_idx + 1:]
-                break
+            # markdown-it always emits heading_open, inline, heading_close
+            title = tokens[i + 1].content.strip()
+            body_tokens = tokens[i + 3:]
+            break
 
     return title, body_tokens
 
@@ -81,19 +115,15 @@ def parse_columns(raw_content):
     if '||' not in raw_content:
         return None
 
-    # Remove title line before splitting
-    lines = raw_content.split('\n')
-    body_lines = []
-    found_title = False
-    for line in lines:
-        if not found_title and line.strip().startswith('#'):
-            found_title = True
-            continue
-        body_lines.append(line)
-
-    body_content = '\n'.join(body_lines)
-    if '||' not in body_content:
-        return None
+    # Remove title line before splitting; reject without copying if '||' is only in it
+    title_line = TITLE_LINE_RE.search(raw_content)
+    if title_line:
+        start, end = title_line.span()
+        if raw_content.find('||', 0, start) == -1 and raw_content.find('||', end) == -1:
+            return None
+        body_content = raw_content[:start] + raw_content[end:]
+    else:
+        body_content = raw_content
 
     columns = [col.strip() for col in body_content.split('||') if col.strip()]
     return columns if 2 <= len(columns) <= 3 else None
@@ -101,14 +131,12 @@ def parse_columns(raw_content):
 
 def determine_layout(title, body_tokens):
     """Determine slide layout: 1 (content) or 2 (section header)"""
-    # Section header: has title but no body content
-    if not body_tokens or all(t.type in ['paragraph_open', 'paragraph_close'] and
-                               (t.type != 'inline' or not t.content.strip())
-                               for t in body_tokens):
-        has_content = any(t.type == 'inline' and t.content.strip() for t in body_tokens)
-        if not has_content:
-            return 2  # Section header
-    return 1  # Content slide
+    # Section header: has title but no body content. Any token other than an
+    # empty paragraph wrapper counts as content, so stop at the first one.
+    for t in body_tokens:
+        if t.type not in ('paragraph_open', 'paragraph_close'):
+            return 1  # Content slide
+    return 2  # Section header
 
 
 # ============================================================================
@@ -123,13 +151,43 @@ def set_margins(text_frame):
     text_frame.margin_bottom = Inches(0.025)
 
 
+def build_solid_fill(color):
+    """Build an <a:solidFill> element for an RGB color."""
+    fill = OxmlElement('a:solidFill')
+    fill.get_or_change_to_srgbClr().val = str(color)
+    return fill
+
+
+# Prebuilt fills for the palette; runs get a cheap deep copy instead of a fresh build
+SOLID_FILLS = {color: build_solid_fill(color) for color in (ACCENT_COLOR, TEXT_COLOR)}
+
+
+def set_run_style(run_elm, font_name, size=None, color=None, bold=False, italic=False, underline=False):
+    """Write run font properties straight onto the <a:rPr> of an <a:r> element."""
+    rPr = run_elm.get_or_add_rPr()
+    if bold:
+        rPr.b = True
+    if italic:
+        rPr.i = True
+    if underline:
+        rPr.u = MSO_UNDERLINE.SINGLE_LINE
+    if size is not None:
+        rPr.sz = size.centipoints
+    if color is not None:
+        fill = SOLID_FILLS[color] if color in SOLID_FILLS else build_solid_fill(color)
+        rPr._remove_eg_fillProperties()
+        rPr._insert_solidFill(deepcopy(fill))
+    rPr.get_or_add_latin().typeface = font_name
+
+
 def apply_inline_formatting(paragraph, inline_token):
     """Apply markdown inline formatting from markdown-it tokens."""
     if not inline_token.children:
         paragraph.text = inline_token.content
         return
 
-    style_stack = []
+    # Nesting depth per style; counters keep nested **a **b** c** bold throughout
+    bold_depth = italic_depth = link_depth = 0
     link_url = None
 
     for child in inline_token.children:
@@ -140,47 +198,43 @@ def apply_inline_formatting(paragraph, inline_token):
 
         # Handle style markers
         if child.type == 'strong_open':
-            style_stack.append('bold')
+            bold_depth += 1
             continue
         elif child.type == 'em_open':
-            style_stack.append('italic')
+            italic_depth += 1
             continue
-        elif child.type == 'strong_close' and 'bold' in style_stack:
-            style_stack.remove('bold')
+        elif child.type == 'strong_close' and bold_depth:
+            bold_depth -= 1
             continue
-        elif child.type == 'em_close' and 'italic' in style_stack:
-            style_stack.remove('italic')
+        elif child.type == 'em_close' and italic_depth:
+            italic_depth -= 1
             continue
         elif child.type == 'link_open':
             if child.attrs and 'href' in child.attrs:
                 link_url = child.attrs['href']
-            style_stack.append('link')
+            link_depth += 1
             continue
-        elif child.type == 'link_close' and 'link' in style_stack:
-            style_stack.remove('link')
+        elif child.type == 'link_close' and link_depth:
+            link_depth -= 1
             link_url = None
             continue
 
+        # Resolve style first so each font property is written only once
+        is_code = child.type == 'code_inline'
+        is_bold = bold_depth > 0
+        is_italic = italic_depth > 0
+        is_link = link_depth > 0 and link_url
+
         # Create run for content
         run = paragraph.add_run()
         run.text = child.content
-        run.font.name = DEFAULT_FONT
-        run.font.size = Pt(18)
-        run.font.color.rgb = TEXT_COLOR
-
-        if child.type == 'code_inline':
-            run.font.name = 'Courier New'
-            run.font.size = Pt(14)
-
-        if 'bold' in style_stack:
-            run.font.bold = True
-            run.font.color.rgb = ACCENT_COLOR
-        if 'italic' in style_stack:
-            run.font.italic = True
-            run.font.color.rgb = ACCENT_COLOR
-        if 'link' in style_stack and link_url:
-            run.font.color.rgb = ACCENT_COLOR
-            run.font.underline = True
+        set_run_style(run._r,
+                      CODE_FONT if is_code else DEFAULT_FONT,
+                      size=CODE_SIZE if is_code else BODY_SIZE,
+                      color=ACCENT_COLOR if is_bold or is_italic or is_link else TEXT_COLOR,
+                      bold=is_bold, italic=is_italic, underline=bool(is_link))
+
+        if is_link:
             try:
                 run.hyperlink.address = link_url
             except:
@@ -189,50 +243,49 @@ def apply_inline_formatting(paragraph, inline_token):
 
 def set_bullet(paragraph, level=0, enable=True):
     """Set or remove bullet formatting for a paragraph."""
-    from pptx.oxml.ns import qn
-    from lxml import etree
-
     pPr = paragraph._p.get_or_add_pPr()
 
-    # Remove any existing bullet elements first
-    for tag in ['buNone', 'buChar', 'buAutoNum', 'buBlip']:
-        for elem in pPr.findall(qn(f'a:{tag}')):
+    # Remove any existing bullet elements first, in one pass over pPr children
+    for elem in list(pPr):
+        if elem.tag in BULLET_TAGS:
             pPr.remove(elem)
 
     if enable:
         # Add bullet character (•) - let PowerPoint/Google Slides handle spacing
-        buChar = etree.SubElement(pPr, qn('a:buChar'))
-        buChar.set('char', '•')
+        buChar = etree.SubElement(pPr, BU_CHAR_TAG)
+        buChar.set('char', BULLET_CHAR)
         # Set level only - spacing will use application defaults
         paragraph.level = level
     else:
         # Explicitly disable bullets
-        etree.SubElement(pPr, qn('a:buNone'))
+        etree.SubElement(pPr, BU_NONE_TAG)
         paragraph.level = 0
 
 
 def add_content_from_tokens(text_frame, tokens):
     """Add content to text frame from markdown-it tokens."""
     text_frame.word_wrap = True
-    text_frame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
+    if AUTO_FIT:
+        text_frame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
     set_margins(text_frame)
 
-    # Clear placeholder text
-    if text_frame.paragraphs:
-        text_frame.paragraphs[0].clear()
+    # Clear placeholder text; its paragraph is reused for the first block
+    paragraphs = text_frame.paragraphs
+    first_para = paragraphs[0] if paragraphs else None
+    if first_para is not None:
+        first_para.clear()
 
-    first_para_used = False
     list_level = -1  # -1 means not in a list
+    num_tokens = len(tokens)
     i = 0
 
-    while i < len(tokens):
+    while i < num_tokens:
         token = tokens[i]
 
         if token.type == 'paragraph_open':
             # Get or create paragraph
-            if not first_para_used and text_frame.paragraphs:
-                p = text_frame.paragraphs[0]
-                first_para_used = True
+            if first_para is not None:
+                p, first_para = first_para, None
             else:
                 p = text_frame.add_paragraph()
 
@@ -245,7 +298,7 @@ def add_content_from_tokens(text_frame, tokens):
                 set_bullet(p, enable=False)
 
             # Apply content
-            if i + 1 < len(tokens) and tokens[i + 1].type == 'inline':
+            if i + 1 < num_tokens and tokens[i + 1].type == 'inline':
                 apply_inline_formatting(p, tokens[i + 1])
                 i += 1
             i += 1
@@ -301,20 +354,21 @@ def add_table_shape(slide, headers, rows):
     shape = slide.shapes.add_table(num_rows, num_cols, left, top, width, height)
     table = shape.table
 
-    for c in range(num_cols):
-        table.columns[c].width = int(width / num_cols)
+    col_width = int(width / num_cols)
+    for column in table.columns:
+        column.width = col_width
 
-    for r in range(num_rows):
-        table.rows[r].height = Inches(0.4)
+    row_height = Inches(0.4)
+    for row in table.rows:
+        row.height = row_height
 
     # Header row
     for c, h in enumerate(headers):
         cell = table.cell(0, c)
         cell.text = h
         for p in cell.text_frame.paragraphs:
-            for run in p.runs:
-                run.font.bold = True
-                run.font.name = DEFAULT_FONT
+            for run_elm in p._p.r_lst:
+                set_run_style(run_elm, DEFAULT_FONT, bold=True)
 
     # Data rows
     for r, row_data in enumerate(rows):
@@ -324,8 +378,8 @@ def add_table_shape(slide, headers, rows):
                 cell.text = cell_text
                 for p in cell.text_frame.paragraphs:
                     p.alignment = MSO_ANCHOR.MIDDLE
-                    for run in p.runs:
-                        run.font.name = DEFAULT_FONT
+                    for run_elm in p._p.r_lst:
+                        set_run_style(run_elm, DEFAULT_FONT)
 
 
 def add_column_layout(slide, columns):
@@ -337,11 +391,12 @@ def add_column_layout(slide, columns):
 
     total_gap = gap * (num_cols - 1)
     col_width = (content_width - total_gap) / num_cols
+    col_step = col_width + gap
 
     for i, col_content in enumerate(columns):
-        col_left = content_left + i * (col_width + gap)
+        col_left = content_left + i * col_step
         textbox = slide.shapes.add_textbox(col_left, content_top, col_width, content_height)
-        col_tokens = MD_PARSER.parse(col_content)
+        col_tokens = parse_markdown(col_content)
         add_content_from_tokens(textbox.text_frame, col_tokens)
 
 
@@ -362,17 +417,14 @@ def style_title(title_shape, title_text, is_section=False):
 
     p = title_frame.paragraphs[0]
     p.text = title_text
-    title_size = Pt(44) if is_section else Pt(32)
+    title_size = SECTION_TITLE_SIZE if is_section else TITLE_SIZE
     p.font.size = title_size
     p.line_spacing = 1.0
     p.space_before = Pt(0)
     p.space_after = Pt(0)
 
-    for run in p.runs:
-        run.font.color.rgb = ACCENT_COLOR
-        run.font.name = DEFAULT_FONT
-        run.font.bold = True
-        run.font.size = title_size
+    for run_elm in p._p.r_lst:
+        set_run_style(run_elm, DEFAULT_FONT, size=title_size, color=ACCENT_COLOR, bold=True)
 
     title_frame.word_wrap = False
     set_margins(title_frame)
@@ -393,13 +445,14 @@ def create_title_slide(prs, frontmatter):
         title_shape.width = Inches(9.0)
         title_shape.height = Inches(1.0)
 
-    # Subtitle area
-    if len(slide.placeholders) > 1:
-        subtitle_shape = slide.placeholders[1]
+    # Subtitle area (placeholder idx 1), found in a single pass
+    subtitle_shape = next((ph for ph in slide.placeholders if ph.placeholder_format.idx == 1), None)
+    if subtitle_shape is not None:
         subtitle_shape.text = ""
         subtitle_frame = subtitle_shape.text_frame
         subtitle_frame.clear()
-        subtitle_frame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
+        if AUTO_FIT:
+            subtitle_frame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
         set_margins(subtitle_frame)
 
         # Build subtitle: subtitle, author, date (no labels)
@@ -410,7 +463,7 @@ def create_title_slide(prs, frontmatter):
             p.text = str(part)
             for run in p.runs:
                 run.font.name = DEFAULT_FONT
-                run.font.size = Pt(24)
+                run.font.size = SUBTITLE_SIZE
 
         subtitle_shape.top = Inches(2.5)
         subtitle_shape.left = Inches(1.5)
@@ -459,18 +512,20 @@ def create_content_slide(prs, title, body_tokens, notes="", raw_content=""):
 
     # Check for special content types
     columns = parse_columns(raw_content) if raw_content else None
-    is_table = any(t.type == 'table_open' for t in body_tokens)
+    # Locate the table once; parsing then starts at table_open instead of rescanning
+    table_start = None if columns else next(
+        (i for i, t in enumerate(body_tokens) if t.type == 'table_open'), None)
 
     if columns:
         # Remove placeholder for column layout (needs custom positioning)
         if content_placeholder:
             remove_shape(slide, content_placeholder)
         add_column_layout(slide, columns)
-    elif is_table:
+    elif table_start is not None:
         # Remove placeholder for table (needs custom positioning)
         if content_placeholder:
             remove_shape(slide, content_placeholder)
-        headers, rows = parse_table_from_tokens(body_tokens)
+        headers, rows = parse_table_from_tokens(body_tokens[table_start:])
         add_table_shape(slide, headers, rows)
     elif body_tokens:
         # Use native content placeholder for proper bullet indentation
@@ -506,8 +561,7 @@ def convert_markdown_to_pptx(markdown_file, output_file):
 
     # Extract frontmatter
     frontmatter, markdown_content = extract_frontmatter(markdown_content)
-    slides_raw = split_slides(markdown_content)
-    print(f"Found {len(slides_raw)} slides")
+    print(f"Found {markdown_content.count(SLIDE_SEPARATOR) + 1} slides")
 
     # Title slide from frontmatter
     slide_num = 1
@@ -517,13 +571,18 @@ def convert_markdown_to_pptx(markdown_file, output_file):
         slide_num += 1
 
     # Process remaining slides
-    for slide_content in slides_raw:
-        if not slide_content.strip():
+    for slide_content in split_slides(markdown_content):
+        if not slide_content or slide_content.isspace():
             continue
         try:
             content, notes = extract_notes(slide_content)
-            title, body_tokens = parse_slide_content(content)
-            layout = determine_layout(title, body_tokens)
+            # A lone plain '#'/'##' line is a section header; skip tokenizing it
+            section_match = SECTION_ONLY_RE.fullmatch(content)
+            if section_match:
+                title, layout = section_match.group(1), 2
+            else:
+                title, body_tokens = parse_slide_content(content)
+                layout = determine_layout(title, body_tokens)
 
             layout_name = "Section" if layout == 2 else "Content"
             print(f"  Slide {slide_num}: {layout_name} - '{title[:50]}...'")